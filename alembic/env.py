@@ -8,6 +8,7 @@ from alembic import context
 # Import your models and settings
 from app.core.config import get_settings
 from app.models.voice_note import Base
+from app.models import transcript_segment  # noqa: F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,38 @@
+"""add transcription lease to voice_notes
+
+Revision ID: 3f8d2c6e9a71
+Revises: 7c1e9a4b2d10
+Create Date: 2026-10-19 11:02:47.190355
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8d2c6e9a71'
+down_revision: Union[str, None] = '7c1e9a4b2d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('voice_notes', sa.Column('transcription_owner', sa.String(length=100), nullable=True))
+    op.add_column('voice_notes', sa.Column('transcription_claimed_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        'ix_voice_notes_transcription_queue',
+        'voice_notes',
+        ['transcription_status', 'transcription_claimed_at'],
+        unique=False,
+        postgresql_where=sa.text(
+            "deleted_at IS NULL AND transcription_status IN ('PENDING', 'PROCESSING')"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_voice_notes_transcription_queue', table_name='voice_notes')
+    op.drop_column('voice_notes', 'transcription_claimed_at')
+    op.drop_column('voice_notes', 'transcription_owner')
@@ -0,0 +1,42 @@
+"""add soft delete to voice_notes
+
+Revision ID: 7c1e9a4b2d10
+Revises: 0532f4e2f825
+Create Date: 2026-10-19 10:12:04.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e9a4b2d10'
+down_revision: Union[str, None] = '0532f4e2f825'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('voice_notes', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        'ix_voice_notes_active_created_at',
+        'voice_notes',
+        ['created_at'],
+        unique=False,
+        postgresql_where=sa.text('deleted_at IS NULL'),
+    )
+    op.create_index(
+        'ix_voice_notes_deleted_at',
+        'voice_notes',
+        ['deleted_at'],
+        unique=False,
+        postgresql_where=sa.text('deleted_at IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_voice_notes_deleted_at', table_name='voice_notes')
+    op.drop_index('ix_voice_notes_active_created_at', table_name='voice_notes')
+    op.drop_column('voice_notes', 'deleted_at')
@@ -0,0 +1,26 @@
+"""add transcription_engine to voice_notes
+
+Revision ID: b5a0e3d7c482
+Revises: 3f8d2c6e9a71
+Create Date: 2026-10-19 13:41:22.806917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5a0e3d7c482'
+down_revision: Union[str, None] = '3f8d2c6e9a71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('voice_notes', sa.Column('transcription_engine', sa.String(length=50), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('voice_notes', 'transcription_engine')
@@ -0,0 +1,38 @@
+"""create transcript_segments table
+
+Revision ID: e2c4f61b8d93
+Revises: b5a0e3d7c482
+Create Date: 2026-10-19 15:08:36.472019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c4f61b8d93'
+down_revision: Union[str, None] = 'b5a0e3d7c482'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('transcript_segments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('voice_note_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('start_ms', sa.Integer(), nullable=False),
+    sa.Column('end_ms', sa.Integer(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('word_timings', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['voice_note_id'], ['voice_notes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_transcript_segments_voice_note_start', 'transcript_segments', ['voice_note_id', 'start_ms'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transcript_segments_voice_note_start', table_name='transcript_segments')
+    op.drop_table('transcript_segments')
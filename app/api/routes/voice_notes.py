@@ -1,6 +1,8 @@
 import asyncio
+import os
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
@@ -11,11 +13,16 @@ from app.schemas.voice_note import (
     VoiceNoteUpdate, 
     VoiceNoteResponse, 
     VoiceNoteList,
-    TranscriptionResponse
+    TranscriptionResponse,
+    TranscriptWordResponse,
+    TranscriptSegmentResponse,
+    TranscriptSegmentList,
+    PhraseOffsetResponse
 )
 from app.utils.file_validator import FileValidator
 from app.utils.file_handler import FileHandler
-from app.services.transcription_service import AssemblyAIService
+from app.services.transcription_service import TranscriptionService
+from app.services.transcript_store import TranscriptStore
 
 router = APIRouter(prefix="/voice-notes", tags=["voice-notes"])
 
@@ -56,13 +63,13 @@ async def create_voice_note(
         db.commit()
         db.refresh(voice_note)
         
-        # Start transcription in background
-        transcription_service = AssemblyAIService()
+        # Start transcription in background; the job is claimed through the
+        # database so a dispatcher in another worker never processes it twice
+        transcription_service = TranscriptionService()
         background_tasks.add_task(
             transcription_service.transcribe_audio_file,
             file_path,
-            voice_note.id,
-            db
+            voice_note.id
         )
         
         return voice_note
@@ -92,10 +99,13 @@ async def list_voice_notes(
     offset = (page - 1) * per_page
     
     # Get total count
-    total = db.query(func.count(VoiceNote.id)).scalar()
+    total = db.query(func.count(VoiceNote.id))\
+        .filter(VoiceNote.deleted_at.is_(None))\
+        .scalar()
     
     # Get paginated results
     voice_notes = db.query(VoiceNote)\
+        .filter(VoiceNote.deleted_at.is_(None))\
         .order_by(VoiceNote.created_at.desc())\
         .offset(offset)\
         .limit(per_page)\
@@ -117,7 +127,10 @@ async def list_voice_notes(
 async def get_voice_note(voice_note_id: int, db: Session = Depends(get_db)):
     """Get specific voice note by ID"""
     
-    voice_note = db.query(VoiceNote).filter(VoiceNote.id == voice_note_id).first()
+    voice_note = db.query(VoiceNote).filter(
+        VoiceNote.id == voice_note_id,
+        VoiceNote.deleted_at.is_(None)
+    ).first()
     if not voice_note:
         raise HTTPException(status_code=404, detail="Voice note not found")
     
@@ -132,7 +145,10 @@ async def update_voice_note(
 ):
     """Update voice note metadata"""
     
-    voice_note = db.query(VoiceNote).filter(VoiceNote.id == voice_note_id).first()
+    voice_note = db.query(VoiceNote).filter(
+        VoiceNote.id == voice_note_id,
+        VoiceNote.deleted_at.is_(None)
+    ).first()
     if not voice_note:
         raise HTTPException(status_code=404, detail="Voice note not found")
     
@@ -149,19 +165,18 @@ async def update_voice_note(
 
 @router.delete("/{voice_note_id}")
 async def delete_voice_note(voice_note_id: int, db: Session = Depends(get_db)):
-    """Delete voice note and associated file"""
+    """Soft delete voice note; the file is removed later by the file GC"""
     
-    voice_note = db.query(VoiceNote).filter(VoiceNote.id == voice_note_id).first()
-    if not voice_note:
-        raise HTTPException(status_code=404, detail="Voice note not found")
-    
-    # Delete file from disk
-    FileHandler.delete_file(voice_note.file_path)
-    
-    # Delete from database
-    db.delete(voice_note)
+    # Single UPDATE; FileGarbageCollector removes the file and the row later
+    deleted = db.query(VoiceNote).filter(
+        VoiceNote.id == voice_note_id,
+        VoiceNote.deleted_at.is_(None)
+    ).update({VoiceNote.deleted_at: func.now()}, synchronize_session=False)
     db.commit()
     
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Voice note not found")
+    
     return {"message": "Voice note deleted successfully"}
 
 
@@ -169,7 +184,10 @@ async def delete_voice_note(voice_note_id: int, db: Session = Depends(get_db)):
 async def get_transcription(voice_note_id: int, db: Session = Depends(get_db)):
     """Get transcription for voice note"""
     
-    voice_note = db.query(VoiceNote).filter(VoiceNote.id == voice_note_id).first()
+    voice_note = db.query(VoiceNote).filter(
+        VoiceNote.id == voice_note_id,
+        VoiceNote.deleted_at.is_(None)
+    ).first()
     if not voice_note:
         raise HTTPException(status_code=404, detail="Voice note not found")
     
@@ -177,6 +195,96 @@ async def get_transcription(voice_note_id: int, db: Session = Depends(get_db)):
         id=voice_note.id,
         transcription_text=voice_note.transcription_text,
         transcription_status=voice_note.transcription_status,
+        transcription_engine=voice_note.transcription_engine,
         created_at=voice_note.created_at,
         updated_at=voice_note.updated_at
-    )
\ No newline at end of file
+    )
+
+
+@router.get("/{voice_note_id}/segments", response_model=TranscriptSegmentList)
+async def get_transcript_segments(
+    voice_note_id: int,
+    start_ms: int = 0,
+    end_ms: Optional[int] = None,
+    include_words: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Get transcript segments overlapping a time window"""
+    
+    if start_ms < 0 or (end_ms is not None and end_ms <= start_ms):
+        raise HTTPException(status_code=400, detail="Invalid time window")
+    
+    voice_note = db.query(VoiceNote).filter(
+        VoiceNote.id == voice_note_id,
+        VoiceNote.deleted_at.is_(None)
+    ).first()
+    if not voice_note:
+        raise HTTPException(status_code=404, detail="Voice note not found")
+    
+    items = []
+    for segment in TranscriptStore.get_segments(db, voice_note_id, start_ms, end_ms):
+        words = None
+        if include_words:
+            words = [
+                TranscriptWordResponse(text=text, start_ms=word_start, end_ms=word_end)
+                for text, (word_start, word_end) in zip(segment.text.split(" "), segment.unpack_timings())
+            ]
+        items.append(TranscriptSegmentResponse(
+            start_ms=segment.start_ms,
+            end_ms=segment.end_ms,
+            text=segment.text,
+            words=words
+        ))
+    
+    return TranscriptSegmentList(
+        voice_note_id=voice_note_id,
+        start_ms=start_ms,
+        end_ms=end_ms,
+        items=items
+    )
+
+
+@router.get("/{voice_note_id}/seek", response_model=PhraseOffsetResponse)
+async def seek_phrase(voice_note_id: int, q: str, db: Session = Depends(get_db)):
+    """Find the audio offset of the first occurrence of a phrase"""
+    
+    voice_note = db.query(VoiceNote).filter(
+        VoiceNote.id == voice_note_id,
+        VoiceNote.deleted_at.is_(None)
+    ).first()
+    if not voice_note:
+        raise HTTPException(status_code=404, detail="Voice note not found")
+    
+    match = TranscriptStore.find_phrase(db, voice_note_id, q)
+    if not match:
+        raise HTTPException(status_code=404, detail="Phrase not found")
+    
+    return PhraseOffsetResponse(
+        voice_note_id=voice_note_id,
+        phrase=q,
+        start_ms=match[0],
+        end_ms=match[1]
+    )
+
+
+@router.get("/{voice_note_id}/audio")
+async def get_audio(voice_note_id: int, db: Session = Depends(get_db)):
+    """Stream the audio file; supports Range requests for seeking"""
+    
+    voice_note = db.query(VoiceNote).filter(
+        VoiceNote.id == voice_note_id,
+        VoiceNote.deleted_at.is_(None)
+    ).first()
+    if not voice_note:
+        raise HTTPException(status_code=404, detail="Voice note not found")
+    
+    # The file may already be gone (GC or manual cleanup)
+    if not os.path.isfile(voice_note.file_path):
+        raise HTTPException(status_code=404, detail="Audio file not found")
+    
+    return FileResponse(
+        voice_note.file_path,
+        media_type=voice_note.mime_type,
+        filename=voice_note.file_name,
+        content_disposition_type="inline"
+    )
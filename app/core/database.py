@@ -11,7 +11,33 @@ database_url = settings.DATABASE_URL
 if database_url.startswith("postgresql://"):
     database_url = database_url.replace("postgresql://", "postgresql+psycopg://", 1)
 
-engine = create_engine(database_url)
+
+def get_pool_limits() -> tuple[int, int]:
+    """
+    Size this process's pool so all workers together stay within the budget
+    Overflow connections come out of the per-process share, not on top of it.
+    An explicit DB_POOL_SIZE bypasses the budget.
+    Returns: (pool_size, max_overflow)
+    """
+    if settings.DB_POOL_SIZE > 0:
+        return settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    
+    processes = max(1, settings.WEB_CONCURRENCY) * max(1, settings.INSTANCE_COUNT)
+    share = max(1, settings.DB_CONNECTION_BUDGET // processes)
+    max_overflow = min(settings.DB_MAX_OVERFLOW, share - 1)
+    return share - max_overflow, max_overflow
+
+
+pool_size, max_overflow = get_pool_limits()
+
+# Created per process at import; the runner does not preload the app so
+# forked workers never share pooled connections
+engine = create_engine(
+    database_url,
+    pool_size=pool_size,
+    max_overflow=max_overflow,
+    pool_pre_ping=True
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
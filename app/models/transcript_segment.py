@@ -0,0 +1,35 @@
+import struct
+from sqlalchemy import Column, Integer, Text, LargeBinary, ForeignKey, Index
+
+from app.core.database import Base
+
+
+class TranscriptSegment(Base):
+    __tablename__ = "transcript_segments"
+
+    id = Column(Integer, primary_key=True)
+    voice_note_id = Column(
+        Integer,
+        ForeignKey("voice_notes.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    position = Column(Integer, nullable=False)
+    start_ms = Column(Integer, nullable=False)
+    end_ms = Column(Integer, nullable=False)
+    # Words joined by single spaces; word i is timed by word_timings[2i:2i+2]
+    text = Column(Text, nullable=False)
+    # Packed little-endian uint32 pairs (start_ms, end_ms), 8 bytes per word
+    word_timings = Column(LargeBinary, nullable=False)
+
+    __table_args__ = (
+        Index("ix_transcript_segments_voice_note_start", "voice_note_id", "start_ms"),
+    )
+
+    @staticmethod
+    def pack_timings(timings: list[tuple[int, int]]) -> bytes:
+        flat = [value for timing in timings for value in timing]
+        return struct.pack(f"<{len(flat)}I", *flat)
+
+    def unpack_timings(self) -> list[tuple[int, int]]:
+        flat = struct.unpack(f"<{len(self.word_timings) // 4}I", self.word_timings)
+        return list(zip(flat[0::2], flat[1::2]))
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Enum, Index
 from sqlalchemy.sql import func
 import enum
 
@@ -32,8 +32,39 @@ class VoiceNote(Base):
         default=TranscriptionStatus.PENDING,
         nullable=False
     )
+    transcription_engine = Column(String(50), nullable=True)
     assemblyai_job_id = Column(String(100), nullable=True)
+    # Job ownership: the worker holding the lease is the only one processing the note
+    transcription_owner = Column(String(100), nullable=True)
+    transcription_claimed_at = Column(DateTime(timezone=True), nullable=True)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
+    
+    # Soft delete: rows are hidden immediately and their files are removed by the GC
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Listing only ever touches live notes
+        Index(
+            "ix_voice_notes_active_created_at",
+            "created_at",
+            postgresql_where=deleted_at.is_(None),
+        ),
+        # Dispatchers only ever scan unfinished transcriptions
+        Index(
+            "ix_voice_notes_transcription_queue",
+            "transcription_status",
+            "transcription_claimed_at",
+            postgresql_where=deleted_at.is_(None) & transcription_status.in_(
+                [TranscriptionStatus.PENDING, TranscriptionStatus.PROCESSING]
+            ),
+        ),
+        # GC only ever scans soft-deleted notes
+        Index(
+            "ix_voice_notes_deleted_at",
+            "deleted_at",
+            postgresql_where=deleted_at.isnot(None),
+        ),
+    )
\ No newline at end of file
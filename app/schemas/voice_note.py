@@ -46,8 +46,36 @@ class TranscriptionResponse(BaseModel):
     id: int
     transcription_text: Optional[str]
     transcription_status: TranscriptionStatus
+    transcription_engine: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime]
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class TranscriptWordResponse(BaseModel):
+    text: str
+    start_ms: int
+    end_ms: int
+
+
+class TranscriptSegmentResponse(BaseModel):
+    start_ms: int
+    end_ms: int
+    text: str
+    words: Optional[list[TranscriptWordResponse]] = None
+
+
+class TranscriptSegmentList(BaseModel):
+    voice_note_id: int
+    start_ms: int
+    end_ms: Optional[int]
+    items: list[TranscriptSegmentResponse]
+
+
+class PhraseOffsetResponse(BaseModel):
+    voice_note_id: int
+    phrase: str
+    start_ms: int
+    end_ms: int
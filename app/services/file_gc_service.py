@@ -0,0 +1,124 @@
+import asyncio
+import os
+import time
+
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.models.voice_note import VoiceNote
+from app.utils.file_handler import FileHandler
+
+settings = get_settings()
+
+
+class FileGarbageCollector:
+    # Arbitrary application-wide key for pg_try_advisory_xact_lock
+    RECONCILE_LOCK_KEY = 0x766E6763  # "vngc"
+
+    def __init__(self):
+        self.batch_size = settings.FILE_GC_BATCH_SIZE
+        self.interval = settings.FILE_GC_INTERVAL_SECONDS
+        self.reconcile_interval = settings.FILE_GC_RECONCILE_INTERVAL_SECONDS
+        self.orphan_grace_seconds = settings.FILE_GC_ORPHAN_GRACE_SECONDS
+
+    def collect_deleted(self) -> int:
+        """
+        Remove files of soft-deleted voice notes in batches, then purge their rows
+        Returns: number of voice notes purged
+        """
+        purged = 0
+        while True:
+            db = SessionLocal()
+            try:
+                # SKIP LOCKED lets several collectors drain the queue without overlapping
+                voice_notes = db.query(VoiceNote)\
+                    .filter(VoiceNote.deleted_at.isnot(None))\
+                    .order_by(VoiceNote.deleted_at)\
+                    .limit(self.batch_size)\
+                    .with_for_update(skip_locked=True)\
+                    .all()
+                if not voice_notes:
+                    db.commit()
+                    return purged
+
+                # Rows are only purged once their file is confirmed gone, so a
+                # failed removal is retried on the next pass instead of orphaned
+                gone = []
+                for voice_note in voice_notes:
+                    if FileHandler.delete_files([voice_note.file_path]):
+                        gone.append(voice_note.id)
+
+                if gone:
+                    db.query(VoiceNote)\
+                        .filter(VoiceNote.id.in_(gone))\
+                        .delete(synchronize_session=False)
+                db.commit()
+                purged += len(gone)
+
+                if len(voice_notes) < self.batch_size or not gone:
+                    return purged
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+
+    def reconcile_orphans(self) -> int:
+        """
+        Remove files in UPLOAD_DIR that no voice note references
+        Returns: number of orphan files removed
+        """
+        # Listed before any transaction so no pooled connection is held during the scan
+        candidates = FileHandler.list_upload_files(min_age_seconds=self.orphan_grace_seconds)
+        if not candidates:
+            return 0
+
+        db = SessionLocal()
+        try:
+            # Only one worker reconciles at a time; the lock is released on commit
+            locked = db.execute(
+                text("SELECT pg_try_advisory_xact_lock(:key)"),
+                {"key": self.RECONCILE_LOCK_KEY}
+            ).scalar()
+            if not locked:
+                return 0
+
+            # Compare by file name so a relative/absolute UPLOAD_DIR change is harmless
+            referenced = {
+                os.path.basename(file_path)
+                for (file_path,) in db.query(VoiceNote.file_path).yield_per(self.batch_size)
+            }
+            db.commit()
+        finally:
+            db.close()
+
+        # Candidates are past the grace period, so no new row can claim them now
+        orphans = [str(path) for path in candidates if path.name not in referenced]
+        removed = 0
+        for start in range(0, len(orphans), self.batch_size):
+            removed += FileHandler.delete_files(orphans[start:start + self.batch_size])
+        return removed
+
+    def run_once(self, reconcile: bool = True) -> tuple[int, int]:
+        """Run one GC pass. Returns: (purged_notes, removed_orphans)"""
+        purged = self.collect_deleted()
+        orphans = self.reconcile_orphans() if reconcile else 0
+        return purged, orphans
+
+    async def run_forever(self):
+        """Periodically run GC passes off the event loop"""
+        # Reconciliation scans the whole directory and table, so it runs far less often
+        next_reconcile = time.monotonic() + self.reconcile_interval
+        while True:
+            try:
+                reconcile = time.monotonic() >= next_reconcile
+                if reconcile:
+                    next_reconcile = time.monotonic() + self.reconcile_interval
+                purged, orphans = await asyncio.to_thread(self.run_once, reconcile)
+                if purged or orphans:
+                    print(f"File GC: purged {purged} voice notes, removed {orphans} orphan files")
+            except Exception as e:
+                print(f"Error in file GC: {e}")
+
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,121 @@
+import re
+from typing import Optional
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.transcript_segment import TranscriptSegment
+from app.services.transcription_engines import TranscriptWord
+
+settings = get_settings()
+
+_SENTENCE_END = (".", "?", "!")
+_NON_WORD = re.compile(r"[^\w']+")
+
+
+def _normalize(word: str) -> str:
+    return _NON_WORD.sub("", word.lower())
+
+
+class TranscriptStore:
+    """Word timings grouped into segments, packed 8 bytes per word"""
+
+    @staticmethod
+    def build_segments(words: list[TranscriptWord]) -> list[list[TranscriptWord]]:
+        """Group words into segments, preferring to break at sentence ends"""
+        max_words = settings.TRANSCRIPT_SEGMENT_MAX_WORDS
+        segments = []
+        current = []
+        for word in words:
+            # Single-space join must round-trip through split()
+            text = word.text.split()
+            if not text:
+                continue
+            current.append(TranscriptWord("".join(text), word.start_ms, word.end_ms))
+
+            at_sentence_end = word.text.endswith(_SENTENCE_END) and len(current) >= max_words // 2
+            if len(current) >= max_words or at_sentence_end:
+                segments.append(current)
+                current = []
+        if current:
+            segments.append(current)
+        return segments
+
+    @staticmethod
+    def replace_segments(db: Session, voice_note_id: int, words: list[TranscriptWord]):
+        """Replace a note's segments with one batched insert. Does not commit."""
+        db.query(TranscriptSegment)\
+            .filter(TranscriptSegment.voice_note_id == voice_note_id)\
+            .delete(synchronize_session=False)
+
+        rows = [
+            {
+                "voice_note_id": voice_note_id,
+                "position": position,
+                "start_ms": segment[0].start_ms,
+                "end_ms": segment[-1].end_ms,
+                "text": " ".join(word.text for word in segment),
+                "word_timings": TranscriptSegment.pack_timings(
+                    [(word.start_ms, word.end_ms) for word in segment]
+                ),
+            }
+            for position, segment in enumerate(TranscriptStore.build_segments(words))
+        ]
+        if rows:
+            db.execute(insert(TranscriptSegment), rows)
+
+    @staticmethod
+    def get_segments(
+        db: Session,
+        voice_note_id: int,
+        start_ms: int,
+        end_ms: Optional[int] = None
+    ) -> list[TranscriptSegment]:
+        """Segments overlapping [start_ms, end_ms)"""
+        # Segments are consecutive and non-overlapping, so the first overlapping
+        # one starts at the last start_ms <= window start. Both bounds then sit on
+        # (voice_note_id, start_ms) and the scan covers just the window.
+        first_start = select(func.max(TranscriptSegment.start_ms))\
+            .where(
+                TranscriptSegment.voice_note_id == voice_note_id,
+                TranscriptSegment.start_ms <= start_ms
+            )\
+            .scalar_subquery()
+        query = db.query(TranscriptSegment)\
+            .filter(
+                TranscriptSegment.voice_note_id == voice_note_id,
+                TranscriptSegment.start_ms >= func.coalesce(first_start, 0),
+                TranscriptSegment.end_ms > start_ms
+            )
+        if end_ms is not None:
+            query = query.filter(TranscriptSegment.start_ms < end_ms)
+        return query.order_by(TranscriptSegment.start_ms).all()
+
+    @staticmethod
+    def find_phrase(db: Session, voice_note_id: int, phrase: str) -> Optional[tuple[int, int]]:
+        """
+        Find the first occurrence of a phrase, matching whole words and ignoring
+        case and punctuation; phrases may span segment boundaries
+        Returns: (start_ms, end_ms) of the match, or None
+        """
+        needle = [token for token in (_normalize(word) for word in phrase.split()) if token]
+        if not needle:
+            return None
+
+        # Rolling window of the last len(needle) words: (token, start_ms, end_ms)
+        window = []
+        segments = db.query(TranscriptSegment)\
+            .filter(TranscriptSegment.voice_note_id == voice_note_id)\
+            .order_by(TranscriptSegment.position)\
+            .yield_per(100)
+        for segment in segments:
+            for word, (start_ms, end_ms) in zip(segment.text.split(" "), segment.unpack_timings()):
+                token = _normalize(word)
+                if not token:
+                    continue
+                window.append((token, start_ms, end_ms))
+                if len(window) > len(needle):
+                    window.pop(0)
+                if len(window) == len(needle) and [entry[0] for entry in window] == needle:
+                    return window[0][1], window[-1][2]
+        return None
@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import importlib.util
+import multiprocessing
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+@dataclass
+class TranscriptWord:
+    text: str
+    start_ms: int
+    end_ms: int
+
+
+@dataclass
+class TranscriptionResult:
+    text: str
+    duration: Optional[float] = None  # seconds, when the engine reports it
+    words: list[TranscriptWord] = field(default_factory=list)
+
+
+class TranscriptionEngine(ABC):
+    """Common interface for every transcription backend"""
+
+    name: str = ""
+
+    def is_available(self) -> bool:
+        """Whether the engine can run in this process (dependencies, credentials)"""
+        return True
+
+    @abstractmethod
+    async def transcribe(
+        self,
+        file_path: str,
+        resume_job_id: Optional[str] = None,
+        on_job_started: Optional[Callable[[str], bool]] = None
+    ) -> Optional[TranscriptionResult]:
+        """
+        Transcribe an audio file
+        Remote engines report their job ID through on_job_started and resume
+        from resume_job_id; a False return from on_job_started aborts the job.
+        Returns: result, or None if transcription failed
+        """
+
+
+# Local engine state lives in the pool processes, loaded once per process
+_whisper_model = None
+
+
+def _init_whisper_model(model_size: str, compute_type: str):
+    global _whisper_model
+    from faster_whisper import WhisperModel
+    _whisper_model = WhisperModel(model_size, device="cpu", compute_type=compute_type)
+
+
+def _run_whisper(file_path: str) -> tuple[str, float, list[tuple[str, int, int]]]:
+    segments, info = _whisper_model.transcribe(file_path, word_timestamps=True)
+    texts = []
+    words = []
+    for segment in segments:
+        texts.append(segment.text.strip())
+        for word in segment.words or []:
+            words.append((word.word.strip(), int(word.start * 1000), int(word.end * 1000)))
+    return " ".join(texts), info.duration, words
+
+
+class LocalWhisperEngine(TranscriptionEngine):
+    """Offline CPU transcription with faster-whisper in a process pool"""
+
+    name = "local"
+    _executor: Optional[ProcessPoolExecutor] = None
+
+    def __init__(self):
+        self.model_size = settings.LOCAL_WHISPER_MODEL
+        self.compute_type = settings.LOCAL_WHISPER_COMPUTE_TYPE
+        self.processes = settings.LOCAL_ENGINE_PROCESSES
+
+    def is_available(self) -> bool:
+        return importlib.util.find_spec("faster_whisper") is not None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created lazily so each web worker builds its own pool. Spawned, not
+        # forked: the web worker has a running loop, threads and open DB sockets.
+        if LocalWhisperEngine._executor is None:
+            LocalWhisperEngine._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_whisper_model,
+                initargs=(self.model_size, self.compute_type)
+            )
+        return LocalWhisperEngine._executor
+
+    @classmethod
+    def shutdown(cls, executor: Optional[ProcessPoolExecutor] = None):
+        """Shut down the pool; with `executor`, only if it is still the current pool"""
+        if cls._executor is None or (executor is not None and cls._executor is not executor):
+            return
+        cls._executor.shutdown(wait=False, cancel_futures=True)
+        cls._executor = None
+
+    async def transcribe(
+        self,
+        file_path: str,
+        resume_job_id: Optional[str] = None,
+        on_job_started: Optional[Callable[[str], bool]] = None
+    ) -> Optional[TranscriptionResult]:
+        executor = None
+        try:
+            loop = asyncio.get_running_loop()
+            try:
+                executor = self._get_executor()
+                text, duration, words = await loop.run_in_executor(executor, _run_whisper, file_path)
+            except BrokenProcessPool:
+                # A pool process died (e.g. OOM loading the model); rebuild and retry once.
+                # Concurrent jobs see the same break, so only the first one replaces the pool.
+                if LocalWhisperEngine._executor is executor:
+                    print("Local transcription pool broke, rebuilding it")
+                    self.shutdown(executor)
+                executor = self._get_executor()
+                text, duration, words = await loop.run_in_executor(executor, _run_whisper, file_path)
+            return TranscriptionResult(
+                text=text,
+                duration=duration,
+                words=[TranscriptWord(*word) for word in words if word[0]]
+            )
+        except BrokenProcessPool as e:
+            print(f"Error in local transcription: {e}")
+            self.shutdown(executor)
+            return None
+        except Exception as e:
+            print(f"Error in local transcription: {e}")
+            return None
+
+
+class FakeTranscriptionEngine(TranscriptionEngine):
+    """Deterministic engine for tests and offline benchmarks"""
+
+    name = "fake"
+    WORD_MS = 400
+
+    def __init__(self, text: Optional[str] = None, delay: float = 0.0):
+        self.text = text
+        self.delay = delay
+
+    async def transcribe(
+        self,
+        file_path: str,
+        resume_job_id: Optional[str] = None,
+        on_job_started: Optional[Callable[[str], bool]] = None
+    ) -> Optional[TranscriptionResult]:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+        text = self.text
+        if text is None:
+            # Same file contents always produce the same transcription
+            digest = await asyncio.to_thread(self._digest, file_path)
+            text = f"Fake transcription of {Path(file_path).name} ({digest})"
+
+        # Evenly spaced word timings
+        words = [
+            TranscriptWord(word, i * self.WORD_MS, (i + 1) * self.WORD_MS)
+            for i, word in enumerate(text.split())
+        ]
+        return TranscriptionResult(text=text, duration=len(words) * self.WORD_MS / 1000, words=words)
+
+    @staticmethod
+    def _digest(file_path: str) -> str:
+        with open(file_path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+@dataclass
+class RoutingRule:
+    """
+    Route a note to `engine` when it fits the limits
+    Duration is compared when known, otherwise file size; a rule
+    without limits matches everything.
+    """
+    engine: str
+    max_duration: Optional[float] = None
+    max_file_size: Optional[int] = None
+
+    def matches(self, duration: Optional[float], file_size: int) -> bool:
+        if self.max_duration is None and self.max_file_size is None:
+            return True
+        if duration is not None and self.max_duration is not None:
+            return duration <= self.max_duration
+        if self.max_file_size is not None:
+            return file_size <= self.max_file_size
+        return False
+
+
+class TranscriptionEngineRouter:
+    def __init__(
+        self,
+        engines: dict[str, TranscriptionEngine],
+        default: str,
+        rules: Optional[list[RoutingRule]] = None,
+        require_available: bool = True
+    ):
+        if default not in engines:
+            raise ValueError(f"Unknown transcription engine {default}. Available engines: {list(engines)}")
+        if require_available and not engines[default].is_available():
+            raise ValueError(
+                f"Transcription engine {default} is not available (missing dependency or credentials)"
+            )
+        self.engines = engines
+        self.default = default
+        self.rules = rules or []
+
+    def get(self, name: str) -> TranscriptionEngine:
+        return self.engines.get(name, self.engines[self.default])
+
+    def select(self, duration: Optional[float], file_size: int) -> TranscriptionEngine:
+        """Pick the first available engine whose rule matches, else the default"""
+        for rule in self.rules:
+            engine = self.engines.get(rule.engine)
+            if engine and engine.is_available() and rule.matches(duration, file_size):
+                return engine
+        return self.engines[self.default]
@@ -1,20 +1,143 @@
 import asyncio
+import os
+import socket
 import httpx
-from typing import Optional
+from datetime import timedelta
+from functools import lru_cache
+from typing import Callable, Optional
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
 
 from app.core.config import get_settings
+from app.core.database import SessionLocal
 from app.models.voice_note import VoiceNote, TranscriptionStatus
+from app.services.transcript_store import TranscriptStore
+from app.services.transcription_engines import (
+    TranscriptionEngine,
+    TranscriptionEngineRouter,
+    TranscriptionResult,
+    TranscriptWord,
+    LocalWhisperEngine,
+    FakeTranscriptionEngine,
+    RoutingRule
+)
 
 settings = get_settings()
 
 
-class AssemblyAIService:
+def get_worker_id() -> str:
+    """Identify this worker process across hosts"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class TranscriptionJobQueue:
+    """Database-coordinated job ownership so a note is never processed twice"""
+    
+    @staticmethod
+    def _claimable():
+        lease_expiry = func.now() - timedelta(seconds=settings.TRANSCRIPTION_LEASE_SECONDS)
+        return and_(
+            VoiceNote.deleted_at.is_(None),
+            or_(
+                VoiceNote.transcription_status == TranscriptionStatus.PENDING,
+                and_(
+                    VoiceNote.transcription_status == TranscriptionStatus.PROCESSING,
+                    or_(
+                        VoiceNote.transcription_claimed_at.is_(None),
+                        VoiceNote.transcription_claimed_at < lease_expiry
+                    )
+                )
+            )
+        )
+    
+    @staticmethod
+    def _claim_values() -> dict:
+        return {
+            VoiceNote.transcription_status: TranscriptionStatus.PROCESSING,
+            VoiceNote.transcription_owner: get_worker_id(),
+            VoiceNote.transcription_claimed_at: func.now(),
+        }
+    
+    @staticmethod
+    def claim(db: Session, voice_note_id: int) -> bool:
+        """Atomically take ownership of one job. Returns: True if this worker owns it"""
+        claimed = db.query(VoiceNote)\
+            .filter(VoiceNote.id == voice_note_id, TranscriptionJobQueue._claimable())\
+            .update(TranscriptionJobQueue._claim_values(), synchronize_session=False)
+        db.commit()
+        return claimed == 1
+    
+    @staticmethod
+    def claim_batch(db: Session, limit: int) -> list[tuple[int, str]]:
+        """
+        Take ownership of up to `limit` pending or abandoned jobs
+        Returns: [(voice_note_id, file_path)]
+        """
+        # SKIP LOCKED keeps concurrent dispatchers from claiming the same rows
+        jobs = db.query(VoiceNote.id, VoiceNote.file_path)\
+            .filter(TranscriptionJobQueue._claimable())\
+            .order_by(VoiceNote.created_at)\
+            .limit(limit)\
+            .with_for_update(skip_locked=True)\
+            .all()
+        
+        if jobs:
+            db.query(VoiceNote)\
+                .filter(VoiceNote.id.in_([job.id for job in jobs]))\
+                .update(TranscriptionJobQueue._claim_values(), synchronize_session=False)
+        db.commit()
+        return [(job.id, job.file_path) for job in jobs]
+    
+    @staticmethod
+    def release_owned(db: Session) -> int:
+        """
+        Hand this worker's running jobs back on shutdown so other workers can
+        claim them right away instead of waiting for the lease to expire
+        Returns: number of jobs released
+        """
+        released = db.query(VoiceNote)\
+            .filter(
+                VoiceNote.transcription_owner == get_worker_id(),
+                VoiceNote.transcription_status == TranscriptionStatus.PROCESSING
+            )\
+            .update(
+                {VoiceNote.transcription_owner: None, VoiceNote.transcription_claimed_at: None},
+                synchronize_session=False
+            )
+        db.commit()
+        return released
+    
+    @staticmethod
+    def update_owned(db: Session, voice_note_id: int, commit: bool = True, **values) -> bool:
+        """
+        Write job results only while this worker still holds the lease
+        With commit=False the caller commits, or rolls back when this returns False
+        """
+        updated = db.query(VoiceNote)\
+            .filter(
+                VoiceNote.id == voice_note_id,
+                VoiceNote.transcription_owner == get_worker_id()
+            )\
+            .update(values, synchronize_session=False)
+        if commit:
+            db.commit()
+        return updated == 1
+
+
+class AssemblyAIService(TranscriptionEngine):
+    """Remote transcription through the AssemblyAI API"""
+    
+    name = "assemblyai"
+    
     def __init__(self):
         self.api_key = settings.ASSEMBLYAI_API_KEY
         self.base_url = "https://api.assemblyai.com/v2"
         self.headers = {"authorization": self.api_key}
     
+    def is_available(self) -> bool:
+        return bool(self.api_key)
+    
     async def upload_file(self, file_path: str) -> Optional[str]:
         """Upload audio file to AssemblyAI and return upload URL"""
         try:
@@ -59,8 +182,10 @@ class AssemblyAIService:
             print(f"Error requesting transcription: {e}")
             return None
     
-    async def get_transcription_status(self, job_id: str) -> tuple[str, Optional[str]]:
-        """Get transcription status and text if completed"""
+    async def get_transcription_status(
+        self, job_id: str
+    ) -> tuple[str, Optional[str], list[TranscriptWord]]:
+        """Get transcription status, and text and word timings if completed"""
         try:
             async with httpx.AsyncClient() as client:
                 response = await client.get(
@@ -71,71 +196,249 @@ class AssemblyAIService:
                 if response.status_code == 200:
                     data = response.json()
                     status = data["status"]
-                    text = data.get("text") if status == "completed" else None
-                    return status, text
+                    if status != "completed":
+                        return status, None, []
+                    words = [
+                        TranscriptWord(word["text"], word["start"], word["end"])
+                        for word in data.get("words") or []
+                    ]
+                    return status, data.get("text"), words
                 else:
                     print(f"Status check failed: {response.text}")
-                    return "error", None
+                    return "error", None, []
         except Exception as e:
             print(f"Error checking transcription status: {e}")
-            return "error", None
+            return "error", None, []
     
-    async def transcribe_audio_file(self, file_path: str, voice_note_id: int, db: Session):
-        """Complete transcription workflow"""
-        try:
-            # Update status to processing
-            voice_note = db.query(VoiceNote).filter(VoiceNote.id == voice_note_id).first()
-            if not voice_note:
-                return
-            
-            voice_note.transcription_status = TranscriptionStatus.PROCESSING
-            db.commit()
-            
+    async def transcribe(
+        self,
+        file_path: str,
+        resume_job_id: Optional[str] = None,
+        on_job_started: Optional[Callable[[str], bool]] = None
+    ) -> Optional[TranscriptionResult]:
+        """Upload, request and poll; resumes polling when given a job ID"""
+        job_id = resume_job_id
+        
+        if not job_id:
             # Upload file
             audio_url = await self.upload_file(file_path)
             if not audio_url:
-                voice_note.transcription_status = TranscriptionStatus.FAILED
-                db.commit()
-                return
+                return None
             
             # Request transcription
             job_id = await self.request_transcription(audio_url)
             if not job_id:
-                voice_note.transcription_status = TranscriptionStatus.FAILED
-                db.commit()
+                return None
+            
+            # Persist job ID; stop if the caller lost the job meanwhile
+            if on_job_started and not on_job_started(job_id):
+                return None
+        
+        # Poll for completion (in production, use webhooks)
+        max_attempts = 60  # 5 minutes with 5-second intervals
+        
+        for _ in range(max_attempts):
+            status, text, words = await self.get_transcription_status(job_id)
+            
+            if status == "completed":
+                return TranscriptionResult(text=text or "", words=words)
+            elif status == "error":
+                return None
+            
+            await asyncio.sleep(5)
+        
+        return None
+
+
+@lru_cache()
+def get_engine_router() -> TranscriptionEngineRouter:
+    """Build the engine router from settings, once per process"""
+    engines = {
+        engine.name: engine
+        for engine in (AssemblyAIService(), LocalWhisperEngine(), FakeTranscriptionEngine())
+    }
+    
+    if settings.TRANSCRIPTION_ENGINE == "auto":
+        # Short notes stay local when the local engine is installed
+        rules = [
+            RoutingRule(
+                engine=LocalWhisperEngine.name,
+                max_duration=settings.LOCAL_ENGINE_MAX_DURATION_SECONDS,
+                max_file_size=settings.LOCAL_ENGINE_MAX_FILE_SIZE
+            )
+        ]
+        # Without an API key everything stays local, if the local engine is installed
+        default = AssemblyAIService.name
+        if not engines[default].is_available() and engines[LocalWhisperEngine.name].is_available():
+            default = LocalWhisperEngine.name
+        
+        # auto never blocks startup; jobs fail until an engine is configured
+        if not engines[default].is_available():
+            print(
+                "Warning: no transcription engine available "
+                "(set ASSEMBLYAI_API_KEY or install faster-whisper); transcriptions will fail"
+            )
+        return TranscriptionEngineRouter(engines, default=default, rules=rules, require_available=False)
+    
+    # An explicitly configured engine must be able to run here
+    return TranscriptionEngineRouter(engines, default=settings.TRANSCRIPTION_ENGINE)
+
+
+class TranscriptionService:
+    def __init__(self, router: Optional[TranscriptionEngineRouter] = None):
+        self.router = router or get_engine_router()
+    
+    async def transcribe_audio_file(self, file_path: str, voice_note_id: int, claimed: bool = False):
+        """Complete transcription workflow, run only by the worker owning the job"""
+        db = SessionLocal()
+        try:
+            # Claim the job; another worker may already own it
+            if not claimed and not TranscriptionJobQueue.claim(db, voice_note_id):
                 return
             
-            # Save job ID
-            voice_note.assemblyai_job_id = job_id
+            voice_note = db.query(
+                VoiceNote.file_size,
+                VoiceNote.duration,
+                VoiceNote.transcription_engine,
+                VoiceNote.assemblyai_job_id
+            ).filter(VoiceNote.id == voice_note_id).first()
+            # End the read transaction so no pooled connection idles through the awaits below
             db.commit()
+            if not voice_note:
+                return
             
-            # Poll for completion (in production, use webhooks)
-            max_attempts = 60  # 5 minutes with 5-second intervals
-            attempt = 0
+            # A job taken over from a dead worker stays on its engine and resumes
+            if voice_note.transcription_engine:
+                engine = self.router.get(voice_note.transcription_engine)
+            else:
+                engine = self.router.select(voice_note.duration, voice_note.file_size)
+                if not TranscriptionJobQueue.update_owned(db, voice_note_id, transcription_engine=engine.name):
+                    return
             
-            while attempt < max_attempts:
-                status, text = await self.get_transcription_status(job_id)
-                
-                if status == "completed":
-                    voice_note.transcription_text = text
-                    voice_note.transcription_status = TranscriptionStatus.COMPLETED
-                    db.commit()
-                    break
-                elif status == "error":
-                    voice_note.transcription_status = TranscriptionStatus.FAILED
-                    db.commit()
-                    break
-                
-                await asyncio.sleep(5)
-                attempt += 1
+            job = asyncio.create_task(engine.transcribe(
+                file_path,
+                resume_job_id=voice_note.assemblyai_job_id,
+                on_job_started=lambda job_id: TranscriptionJobQueue.update_owned(
+                    db, voice_note_id, assemblyai_job_id=job_id
+                )
+            ))
+            lease = asyncio.create_task(self._renew_lease(voice_note_id))
+            try:
+                done, _ = await asyncio.wait({job, lease}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                lease.cancel()
+                if not job.done():
+                    job.cancel()
+            
+            # The lease was lost, so another worker owns the job now
+            if job not in done:
+                print(f"Lost transcription lease for voice note {voice_note_id}")
+                return
+            
+            result = job.result()
+            if result is None:
+                TranscriptionJobQueue.update_owned(
+                    db, voice_note_id, transcription_status=TranscriptionStatus.FAILED
+                )
+                return
+            
+            values = {
+                "transcription_text": result.text,
+                "transcription_status": TranscriptionStatus.COMPLETED,
+            }
+            if result.duration is not None:
+                values["duration"] = result.duration
             
-            # If we reached max attempts, mark as failed
-            if attempt >= max_attempts:
-                voice_note.transcription_status = TranscriptionStatus.FAILED
+            # Segments and the completed status land in one transaction
+            TranscriptStore.replace_segments(db, voice_note_id, result.words)
+            if TranscriptionJobQueue.update_owned(db, voice_note_id, commit=False, **values):
                 db.commit()
+            else:
+                db.rollback()
                 
         except Exception as e:
             print(f"Error in transcription workflow: {e}")
-            if 'voice_note' in locals():
-                voice_note.transcription_status = TranscriptionStatus.FAILED
-                db.commit()
\ No newline at end of file
+            db.rollback()
+            TranscriptionJobQueue.update_owned(
+                db, voice_note_id, transcription_status=TranscriptionStatus.FAILED
+            )
+        finally:
+            db.close()
+
+
+    @staticmethod
+    async def _renew_lease(voice_note_id: int):
+        """Keep refreshing the claim while the job runs; returns once the lease is lost"""
+        interval = max(1, settings.TRANSCRIPTION_LEASE_SECONDS // 3)
+        while True:
+            await asyncio.sleep(interval)
+            db = SessionLocal()
+            try:
+                renewed = TranscriptionJobQueue.update_owned(
+                    db, voice_note_id, transcription_claimed_at=func.now()
+                )
+            except Exception as e:
+                # Retry on the next tick; the lease outlives two missed renewals
+                print(f"Error renewing transcription lease: {e}")
+                db.rollback()
+                renewed = True
+            finally:
+                db.close()
+            
+            if not renewed:
+                return
+
+
+class TranscriptionDispatcher:
+    """Picks up unclaimed or abandoned transcription jobs in every worker"""
+    
+    def __init__(self, service: Optional[TranscriptionService] = None):
+        self.service = service or TranscriptionService()
+        self.max_jobs = settings.TRANSCRIPTION_MAX_CONCURRENT_JOBS
+        self.interval = settings.TRANSCRIPTION_DISPATCH_INTERVAL_SECONDS
+        self.tasks: set[asyncio.Task] = set()
+    
+    @staticmethod
+    def _claim_batch(limit: int) -> list[tuple[int, str]]:
+        db = SessionLocal()
+        try:
+            return TranscriptionJobQueue.claim_batch(db, limit)
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _release_owned() -> int:
+        db = SessionLocal()
+        try:
+            return TranscriptionJobQueue.release_owned(db)
+        finally:
+            db.close()
+    
+    async def shutdown(self):
+        """Cancel running jobs and release every lease this worker holds"""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        
+        # Also covers jobs started from request background tasks
+        released = await asyncio.to_thread(self._release_owned)
+        if released:
+            print(f"Released {released} transcription jobs on shutdown")
+    
+    async def run_forever(self):
+        """Periodically claim jobs and run them, at most max_jobs at a time"""
+        while True:
+            try:
+                free_slots = self.max_jobs - len(self.tasks)
+                if free_slots > 0:
+                    jobs = await asyncio.to_thread(self._claim_batch, free_slots)
+                    for voice_note_id, file_path in jobs:
+                        task = asyncio.create_task(
+                            self.service.transcribe_audio_file(file_path, voice_note_id, claimed=True)
+                        )
+                        self.tasks.add(task)
+                        task.add_done_callback(self.tasks.discard)
+            except Exception as e:
+                print(f"Error dispatching transcriptions: {e}")
+            
+            await asyncio.sleep(self.interval)
@@ -1,4 +1,5 @@
 import os
+import time
 import uuid
 from pathlib import Path
 from fastapi import UploadFile
@@ -44,6 +45,41 @@ class FileHandler:
         except Exception:
             return False
     
+    @staticmethod
+    def delete_files(file_paths: list[str]) -> int:
+        """
+        Delete a batch of files from disk
+        Returns: number of paths no longer present on disk
+        """
+        removed = 0
+        for file_path in file_paths:
+            try:
+                os.remove(file_path)
+                removed += 1
+            except FileNotFoundError:
+                removed += 1
+            except Exception:
+                continue
+        return removed
+    
+    @staticmethod
+    def list_upload_files(min_age_seconds: int = 0) -> list[Path]:
+        """List files in the upload directory older than min_age_seconds"""
+        upload_dir = Path(settings.UPLOAD_DIR)
+        if not upload_dir.is_dir():
+            return []
+        
+        cutoff = time.time() - min_age_seconds
+        files = []
+        with os.scandir(upload_dir) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file() and entry.stat().st_mtime <= cutoff:
+                        files.append(Path(entry.path))
+                except FileNotFoundError:
+                    continue
+        return files
+    
     @staticmethod
     def get_file_size(file_path: str) -> int:
         """Get file size in bytes"""
@@ -0,0 +1,167 @@
+"""Run the whole upload -> transcription -> seek pipeline offline.
+
+Starts serve.py with TRANSCRIPTION_ENGINE=fake, uploads notes, waits for the
+dispatchers to complete every transcription, checks the engine used, the
+stored transcript, segments and phrase offsets, and reports notes per second.
+Needs the database from DATABASE_URL but no network access. Exits non-zero
+on any mismatch.
+
+    python benchmarks/bench_pipeline.py --notes 200 --workers 2
+"""
+import argparse
+import asyncio
+import os
+import struct
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+API = "/api/v1/voice-notes"
+
+# Every FakeTranscriptionEngine transcript starts with this phrase,
+# with words spaced evenly WORD_MS apart
+WORD_MS = 400
+PHRASE = "Fake transcription of"
+
+
+def make_wav(index: int) -> bytes:
+    """Tiny valid WAV whose samples differ per note"""
+    samples = struct.pack("<64h", *([index % 32768] * 64))
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + len(samples), b"WAVE", b"fmt ", 16, 1, 1, 8000, 16000, 2, 16,
+        b"data", len(samples)
+    )
+    return header + samples
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not become ready")
+
+
+async def upload(client: httpx.AsyncClient, index: int) -> int:
+    response = await client.post(
+        f"{API}/",
+        files={"file": (f"note-{index}.wav", make_wav(index), "audio/wav")},
+        data={"title": f"Pipeline note {index}"}
+    )
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+async def wait_for_transcriptions(client: httpx.AsyncClient, ids: list[int], timeout: float) -> dict:
+    pending = set(ids)
+    results = {}
+    deadline = time.monotonic() + timeout
+    while pending and time.monotonic() < deadline:
+        for voice_note_id in list(pending):
+            data = (await client.get(f"{API}/{voice_note_id}/transcription")).json()
+            if data["transcription_status"] in ("completed", "failed"):
+                results[voice_note_id] = data
+                pending.discard(voice_note_id)
+        if pending:
+            await asyncio.sleep(0.5)
+    for voice_note_id in pending:
+        results[voice_note_id] = {"transcription_status": "timeout"}
+    return results
+
+
+async def verify(client: httpx.AsyncClient, voice_note_id: int, data: dict) -> list[str]:
+    errors = []
+    if data["transcription_status"] != "completed":
+        return [f"note {voice_note_id}: status {data['transcription_status']}"]
+    if data.get("transcription_engine") != "fake":
+        errors.append(f"note {voice_note_id}: engine {data.get('transcription_engine')}")
+    if not (data.get("transcription_text") or "").startswith(PHRASE):
+        errors.append(f"note {voice_note_id}: unexpected text {data.get('transcription_text')!r}")
+
+    seek = await client.get(f"{API}/{voice_note_id}/seek", params={"q": PHRASE})
+    expected = {"start_ms": 0, "end_ms": len(PHRASE.split()) * WORD_MS}
+    if seek.status_code != 200 or {k: seek.json()[k] for k in expected} != expected:
+        errors.append(f"note {voice_note_id}: seek returned {seek.status_code} {seek.text}")
+
+    segments = await client.get(f"{API}/{voice_note_id}/segments", params={"end_ms": WORD_MS})
+    if segments.status_code != 200 or not segments.json()["items"]:
+        errors.append(f"note {voice_note_id}: no segments in the first word")
+    return errors
+
+
+async def run_pipeline(args) -> int:
+    base_url = f"http://127.0.0.1:{args.port}"
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        await wait_until_ready(client)
+
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def limited_upload(index: int) -> int:
+            async with semaphore:
+                return await upload(client, index)
+
+        ids = await asyncio.gather(*(limited_upload(i) for i in range(args.notes)))
+        results = await wait_for_transcriptions(client, ids, args.timeout)
+        elapsed = time.perf_counter() - start
+
+        errors = []
+        for voice_note_id in ids:
+            errors.extend(await verify(client, voice_note_id, results[voice_note_id]))
+
+        # Clean up through the API; the file GC removes the uploads
+        for voice_note_id in ids:
+            await client.delete(f"{API}/{voice_note_id}")
+
+    print(f"{args.notes} notes transcribed in {elapsed:.2f}s ({args.notes / elapsed:.1f} notes/s)")
+    for error in errors[:20]:
+        print(f"FAIL {error}")
+    if errors:
+        print(f"{len(errors)} failures")
+    return 1 if errors else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(args.workers),
+        PORT=str(args.port),
+        HOST="127.0.0.1",
+        TRANSCRIPTION_ENGINE="fake",
+        TRANSCRIPTION_DISPATCHER_ENABLED="true",
+        TRANSCRIPTION_DISPATCH_INTERVAL_SECONDS="1",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "serve.py"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        sys.exit(asyncio.run(run_pipeline(args)))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Measure request throughput as the worker count grows on one machine.
+
+Starts serve.py once per worker count, waits for /health, then fires
+concurrent GET requests and reports requests per second.
+
+    python benchmarks/bench_workers.py --workers 1 2 4 --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                response = await client.get(f"{base_url}/health")
+                if response.status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not become ready")
+
+
+async def fire(base_url: str, path: str, total: int, concurrency: int) -> tuple[float, int]:
+    """Returns: (elapsed_seconds, failed_requests)"""
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+    failed = 0
+
+    async def client_loop(client: httpx.AsyncClient):
+        nonlocal failed
+        while not queue.empty():
+            queue.get_nowait()
+            try:
+                response = await client.get(f"{base_url}{path}")
+                if response.status_code != 200:
+                    failed += 1
+            except httpx.HTTPError:
+                failed += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        return time.perf_counter() - start, failed
+
+
+def run(workers: int, args) -> tuple[float, int]:
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        PORT=str(args.port),
+        HOST="127.0.0.1",
+        # Starts without an AssemblyAI key or faster-whisper
+        TRANSCRIPTION_ENGINE="fake",
+        # Keep background loops out of the measurement
+        FILE_GC_ENABLED="false",
+        TRANSCRIPTION_DISPATCHER_ENABLED="false",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "serve.py"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_until_ready(base_url))
+        # Warm up every worker's pool before measuring
+        asyncio.run(fire(base_url, args.path, workers * 50, args.concurrency))
+        return asyncio.run(fire(base_url, args.path, args.requests, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--path", default="/api/v1/voice-notes/?per_page=20")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'req/s':>10} {'failed':>8} {'speedup':>8}")
+    baseline = None
+    for workers in args.workers:
+        elapsed, failed = run(workers, args)
+        throughput = args.requests / elapsed
+        baseline = baseline or throughput
+        print(f"{workers:>8} {throughput:>10.1f} {failed:>8} {throughput / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,50 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes import voice_notes
 from app.core.config import get_settings
+from app.services.file_gc_service import FileGarbageCollector
+from app.services.transcription_engines import LocalWhisperEngine
+from app.services.transcription_service import TranscriptionDispatcher, get_engine_router
+
+settings = get_settings()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fail at startup, not per job, when the configured engine cannot run
+    get_engine_router()
+    
+    # Every worker runs these loops; they coordinate through the database
+    tasks = []
+    dispatcher = TranscriptionDispatcher()
+    if settings.FILE_GC_ENABLED:
+        tasks.append(asyncio.create_task(FileGarbageCollector().run_forever()))
+    if settings.TRANSCRIPTION_DISPATCHER_ENABLED:
+        tasks.append(asyncio.create_task(dispatcher.run_forever()))
+    
+    yield
+    
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    
+    # Hand in-flight jobs back so a rolling deploy does not wait out the lease
+    try:
+        await dispatcher.shutdown()
+    except Exception as e:
+        print(f"Error releasing transcription jobs: {e}")
+    LocalWhisperEngine.shutdown()
+
 
 app = FastAPI(
     title="Voice Notes API",
     description="MVP API for voice notes with audio transcription",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -34,6 +71,7 @@ async def setup_database():
     try:
         from app.core.database import engine
         from app.models.voice_note import Base
+        from app.models import transcript_segment  # noqa: F401
         
         # Create all tables
         Base.metadata.create_all(bind=engine)
@@ -0,0 +1,58 @@
+"""Production entry point: python serve.py
+
+Runs the app under gunicorn with uvicorn workers when gunicorn is available,
+falling back to uvicorn's own process manager otherwise. Worker count and
+per-worker DB pool sizes come from WEB_CONCURRENCY, INSTANCE_COUNT and
+DB_CONNECTION_BUDGET (see app/core/config.py).
+"""
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+def run_gunicorn():
+    from gunicorn.app.base import BaseApplication
+
+    class VoiceNotesApplication(BaseApplication):
+        def __init__(self, options: dict):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+            return app
+
+    VoiceNotesApplication({
+        "bind": f"{settings.HOST}:{settings.PORT}",
+        "workers": settings.WEB_CONCURRENCY,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "timeout": settings.WORKER_TIMEOUT,
+        "graceful_timeout": settings.WORKER_TIMEOUT,
+        # Each worker must build its own engine and pool after the fork
+        "preload_app": False,
+    }).run()
+
+
+def run_uvicorn():
+    import uvicorn
+
+    uvicorn.run(
+        "main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=settings.WEB_CONCURRENCY,
+        timeout_graceful_shutdown=settings.WORKER_TIMEOUT,
+    )
+
+
+if __name__ == "__main__":
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        run_uvicorn()
+    else:
+        run_gunicorn()